@@ -1,26 +1,80 @@
 # auth.py
 import os
+import io
 import json
-from dotenv import load_dotenv # load_dotenv é chamado dentro da função get_user_credentials
+from dotenv import dotenv_values
 
 USERS_FILE = "data/users.json"
 
+# O .env e o users.json (ficheiros pequenos) são relidos a cada pedido do FUSE;
+# só a interpretação é guardada, associada ao conteúdo exato que foi lido, para
+# evitar um parse por pedido. Qualquer alteração do conteúdo é vista no pedido
+# seguinte, independentemente do mtime ou do tamanho do ficheiro.
+_env_cache = (None, {})     # (conteúdo, valores do .env)
+_users_cache = (None, None) # (conteúdo, utilizadores)
+
+
+def _env_candidates():
+    # Os mesmos caminhos que o find_dotenv() percorre a partir deste módulo
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        yield os.path.join(directory, ".env")
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
+
+
+_ENV_CANDIDATES = list(_env_candidates())
+
+
+def _read_bytes(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+
+
+def _load_env():
+    # Mesma procura do load_dotenv() (a partir do diretório deste módulo)
+    global _env_cache
+    for env_path in _ENV_CANDIDATES:
+        raw = _read_bytes(env_path)
+        if raw is not None:
+            break
+    else:
+        return {}
+    cached_raw, values = _env_cache
+    if raw != cached_raw:
+        values = dotenv_values(stream=io.StringIO(raw.decode("utf-8")))
+        _env_cache = (raw, values) # Substituição atómica do par: sem lock
+    return values
+
+
+def _load_users():
+    global _users_cache
+    raw = _read_bytes(USERS_FILE)
+    if raw is None:
+        return None
+    cached_raw, data = _users_cache
+    if raw != cached_raw:
+        data = json.loads(raw)
+        _users_cache = (raw, data)
+    return data
+
+
 def get_user_credentials():
-    # Mova load_dotenv para aqui para garantir que é chamado a cada vez
-    # que as credenciais são pedidas, apanhando alterações no .env
-    load_dotenv(override=True) 
-    
-    user_name = os.getenv("USER", "default_user") 
-    # print(f"[DEBUG] auth.py - Usuário autenticado: {user_name}") 
-    
+    user_name = get_current_user()
+    # print(f"[DEBUG] auth.py - Usuário autenticado: {user_name}")
+
     #read users from a json file
-    if not os.path.exists(USERS_FILE):
+    user_clearance_data = _load_users()
+    if user_clearance_data is None:
         return "UNCLASSIFIED", False
-    
-    with open(USERS_FILE, "r") as f:
-        user_clearance_data = json.load(f)
+
     credentials = user_clearance_data.get(user_name)
-    
+
     if credentials:
         level = credentials.get("level", "UNCLASSIFIED")
         trusted = credentials.get("trusted", False)
@@ -32,6 +86,6 @@ def get_user_credentials():
 
 
 def get_current_user():
-    load_dotenv(override=True)
-    return os.getenv("USER", "default_user")
+    # O USER do .env tem precedência sobre o do ambiente, como com load_dotenv(override=True)
+    return _load_env().get("USER") or os.getenv("USER", "default_user")
 
@@ -0,0 +1,124 @@
+"""
+Benchmark das operações bulk do fsclient face a chamadas sequenciais.
+
+Com --mount, cria N ficheiros pequenos num diretório da montagem ativa, lê-os
+sequencialmente (Session.read) e em bulk (Session.bulk_read) e apaga-os no fim.
+O servidor deve estar em modo --threads para que os pedidos corram em paralelo.
+
+Sem --mount, mede as duas partes separadamente:
+  * cliente: Session.read vs Session.bulk_read num diretório local;
+  * servidor: getattr+open+read+release do SecurePassthrough, sequencial vs
+    o mesmo número de threads que o FUSE usaria com --threads. Importar o
+    fuse_main requer o libfuse; sem ele, esta parte é ignorada com um aviso.
+
+Exemplos:
+    python3 bench_fsclient.py
+    python3 bench_fsclient.py --files 5000 --concurrency 64
+    python3 bench_fsclient.py --mount /tmp/montagem --user admin --dir unclassified
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import logger
+from fsclient import Session
+
+PAYLOAD = b"x" * 64
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def report(title, sequential, bulk, count, concurrency):
+    print(f"\n{title} ({count} ficheiros, concorrência {concurrency}):")
+    print(f"  sequencial: {sequential:8.3f}s ({count / sequential:10.0f} ficheiros/s)")
+    print(f"  bulk:       {bulk:8.3f}s ({count / bulk:10.0f} ficheiros/s)")
+    print(f"  speedup:    {sequential / bulk:8.2f}x")
+
+
+def bench_session(session, names, concurrency):
+    """Lê os ficheiros 'names' sequencialmente e em bulk; devolve os tempos."""
+    sequential, _ = timed(lambda: [session.read(n) for n in names])
+    bulk, results = timed(lambda: session.bulk_read(names, max_concurrency=concurrency))
+    failed = [r for r in results if not r.ok]
+    if failed:
+        print(f"[AVISO] {len(failed)} leituras falharam (ex: {failed[0].path}: {failed[0].error})")
+    return sequential, bulk
+
+
+def bench_server(server_class, root, names, concurrency):
+    """Custo dos métodos do SecurePassthrough por leitura, sequencial vs threads."""
+    fs = server_class(root)
+    paths = [f"/{n}" for n in names]
+
+    def one(path):
+        fs.getattr(path)
+        fh = fs.open(path, os.O_RDONLY)
+        try:
+            return fs.read(path, 4096, 0, fh)
+        finally:
+            fs.release(path, fh)
+
+    sequential, _ = timed(lambda: [one(p) for p in paths])
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        threaded, _ = timed(lambda: list(pool.map(one, paths)))
+    return sequential, threaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de Session.bulk_read face a leituras sequenciais.")
+    parser.add_argument("--files", type=int, default=2000, help="Número de ficheiros pequenos (por omissão: 2000)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concorrência do bulk (por omissão: 32)")
+    parser.add_argument("--mount", help="Ponto de montagem FUSE ativo")
+    parser.add_argument("--user", help="Utilizador da sessão no modo montagem (por omissão: o do .env)")
+    parser.add_argument("--dir", default="unclassified", help="Diretório da montagem onde criar os ficheiros (por omissão: unclassified)")
+    args = parser.parse_args(argv)
+
+    names = [f"bench_{i}.txt" for i in range(args.files)]
+
+    if args.mount:
+        session = Session(args.mount, user=args.user, cwd=args.dir, max_concurrency=args.concurrency)
+        created = session.bulk_write({n: PAYLOAD for n in names})
+        failed = [r for r in created if not r.ok]
+        if failed:
+            print(f"[ERRO] Não foi possível criar os ficheiros: {failed[0].path}: {failed[0].error}")
+            session.bulk_delete([r.path for r in created if r.ok])
+            return 1
+        try:
+            sequential, bulk = bench_session(session, names, args.concurrency)
+            report(f"Montagem {args.mount}/{args.dir}", sequential, bulk, len(names), args.concurrency)
+        finally:
+            session.bulk_delete(names)
+        return 0
+
+    tmp = tempfile.mkdtemp(prefix="bench_")
+    try:
+        for n in names:
+            with open(os.path.join(tmp, n), "wb") as f:
+                f.write(PAYLOAD)
+
+        sequential, bulk = bench_session(Session(tmp), names, args.concurrency)
+        report("Cliente (diretório local, sem FUSE)", sequential, bulk, len(names), args.concurrency)
+
+        logger.AUDIT_LOG = os.path.join(tmp, "audit.log") # não escreve no audit.log do repositório
+        try:
+            from fuse_main import SecurePassthrough # O fusepy levanta OSError sem o libfuse
+        except (ImportError, OSError) as e:
+            print(f"\n[AVISO] Medição do servidor ignorada: requer o fusepy e o libfuse ({e}).")
+        else:
+            sequential, threaded = bench_server(SecurePassthrough, tmp, names, args.concurrency)
+            report("Servidor (métodos do SecurePassthrough, sem FUSE)", sequential, threaded, len(names), args.concurrency)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
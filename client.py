@@ -2,8 +2,10 @@ import os
 import json
 from dotenv import load_dotenv
 from logger import log_action
+import fsclient
+from fsclient import PathEscapeError
 
-MOUNTPOINT = "/tmp/montagem" # Ponto de montagem para o sistema de ficheiros FUSE
+MOUNTPOINT = fsclient.MOUNTPOINT # Ponto de montagem para o sistema de ficheiros FUSE
 
 # Variável global para o diretório de trabalho atual relativo ao MOUNTPOINT
 current_relative_path = "" # Inicia na raiz do MOUNTPOINT
@@ -31,33 +33,13 @@ def resolve_path(user_input_path):
     Caso contrário, é relativo ao current_relative_path.
     Retorna o caminho normalizado relativo ao MOUNTPOINT.
     """
-    global current_relative_path
-    if user_input_path.startswith('/'):
-        # Caminho absoluto a partir da raiz do MOUNTPOINT
-        base = "" # Relativo ao MOUNTPOINT
-        path_to_join = user_input_path[1:] # Remove a barra inicial
-    else:
-        # Caminho relativo ao diretório atual
-        base = current_relative_path
-        path_to_join = user_input_path
-
-    combined_path = os.path.join(base, path_to_join)
-    
-    # Normaliza o caminho (resolve '..' e '.')
-    normalized_path = os.path.normpath(combined_path)
-
-    # Garante que o caminho não saia da raiz do MOUNTPOINT (ex: "cd ../../../../../tmp")
-    if normalized_path == ".." and not current_relative_path: # Tentando sair da raiz
-        return "" # Volta para a raiz
-    if normalized_path.startswith(".."):
+    try:
+        return fsclient.resolve_path(current_relative_path, user_input_path)
+    except PathEscapeError:
+        # Garante que o caminho não saia da raiz do MOUNTPOINT (ex: "cd ../../../../../tmp")
         print("[AVISO] Tentativa de aceder fora da raiz do ponto de montagem foi bloqueada.")
         return current_relative_path
 
-    if normalized_path == ".":
-        normalized_path = ""
-        
-    return normalized_path
-
 
 # client.py
 def login():
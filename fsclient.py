@@ -0,0 +1,377 @@
+"""
+Biblioteca cliente para o sistema de ficheiros seguro.
+
+Ao contrário do client.py (shell interativa com estado global), cada Session
+guarda o seu próprio ponto de montagem, diretório de trabalho e identidade, e
+devolve valores ou levanta exceções em vez de imprimir mensagens.
+Fornece uma interface síncrona (Session), uma interface asyncio (AsyncSession)
+e variantes "bulk" que distribuem as operações por um executor com
+concorrência limitada e devolvem uma lista de BulkResult.
+
+Exemplo:
+    from fsclient import Session
+    s = Session("/tmp/montagem", user="admin")
+    s.cd("secret")
+    results = s.bulk_read(s.listdir())
+"""
+import asyncio
+import os
+import stat
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+MOUNTPOINT = "/tmp/montagem"
+ENV_FILE = ".env"
+DEFAULT_CONCURRENCY = 32
+
+
+class PathEscapeError(PermissionError):
+    """Tentativa de aceder a um caminho fora da raiz do ponto de montagem."""
+
+
+@dataclass
+class BulkResult:
+    """Resultado de uma operação individual dentro de uma operação bulk."""
+    path: str
+    ok: bool
+    value: Any = None
+    error: Optional[Exception] = None
+
+
+def resolve_path(cwd, user_input_path):
+    """
+    Resolve o caminho fornecido pelo usuário.
+    Se começar com '/', é absoluto a partir do ponto de montagem.
+    Caso contrário, é relativo a 'cwd'.
+    Retorna o caminho normalizado relativo ao ponto de montagem e levanta
+    PathEscapeError se o caminho sair da raiz.
+    """
+    if user_input_path.startswith('/'):
+        base = ""
+        path_to_join = user_input_path[1:]
+    else:
+        base = cwd
+        path_to_join = user_input_path
+
+    normalized_path = os.path.normpath(os.path.join(base, path_to_join))
+
+    # ".." na raiz fica na raiz (ex: "cd .." em "/")
+    if normalized_path == ".." and not cwd:
+        return ""
+    if normalized_path == ".." or normalized_path.startswith("../") or os.path.isabs(normalized_path):
+        raise PathEscapeError(f"Caminho fora da raiz do ponto de montagem: {user_input_path}")
+
+    if normalized_path == ".":
+        normalized_path = ""
+    return normalized_path
+
+
+def write_env(env_file, user):
+    """
+    Escreve 'USER=<user>' no .env que o servidor lê, se o conteúdo for diferente.
+    O ficheiro é substituído de forma atómica (ficheiro temporário + os.replace),
+    para que um servidor multi-thread nunca leia um .env vazio ou incompleto.
+    """
+    content = f"USER={user}\n"
+    try:
+        with open(env_file, "r") as f:
+            if f.read() == content:
+                return
+    except FileNotFoundError:
+        pass
+    fd, tmp = tempfile.mkstemp(prefix=".env.", dir=os.path.dirname(os.path.abspath(env_file)))
+    try:
+        os.fchmod(fd, 0o644) # mkstemp cria o ficheiro com 0600
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp, env_file)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class _IdentityGate:
+    """
+    O servidor FUSE lê a identidade do ficheiro .env, que é global ao processo.
+    Operações com a mesma identidade correm em paralelo; trocar de identidade
+    espera que as operações da identidade anterior terminem. Quando outra
+    identidade está à espera, novas operações da identidade ativa deixam de
+    entrar, para que um bulk longo não a atrase indefinidamente.
+    """
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = None # (utilizador, ficheiro .env)
+        self._count = 0
+        self._waiting = Counter()
+
+    def _can_enter(self, key):
+        if not self._count:
+            return True
+        if self._active != key:
+            return False
+        return not any(n for k, n in self._waiting.items() if k != key)
+
+    def acquire(self, user, env_file):
+        key = (user, env_file)
+        with self._cond:
+            self._waiting[key] += 1
+            try:
+                while not self._can_enter(key):
+                    self._cond.wait()
+            finally:
+                self._waiting[key] -= 1
+                if not self._waiting[key]:
+                    del self._waiting[key]
+            # O .env pode ter sido alterado por outro processo entretanto: quando não
+            # há operações em curso confirma-o, mas só o reescreve se for diferente
+            if not self._count:
+                write_env(env_file, user)
+                self._active = key
+            self._count += 1
+
+    def release(self):
+        with self._cond:
+            self._count -= 1
+            if not self._count:
+                self._cond.notify_all()
+
+
+_identity_gate = _IdentityGate()
+
+
+class _AsIdentity:
+    def __init__(self, session):
+        self.session = session
+
+    def __enter__(self):
+        if self.session.user is not None:
+            _identity_gate.acquire(self.session.user, self.session.env_file)
+
+    def __exit__(self, *exc):
+        if self.session.user is not None:
+            _identity_gate.release()
+
+
+class Session:
+    """
+    Sessão cliente com ponto de montagem, diretório de trabalho e identidade próprios.
+    Se 'user' for None, as operações usam a identidade já presente no .env.
+    Os erros do sistema de ficheiros são propagados como OSError
+    (ex: PermissionError quando a política BLP nega a operação).
+    """
+    def __init__(self, mountpoint=MOUNTPOINT, user=None, cwd="", env_file=ENV_FILE,
+                 max_concurrency=DEFAULT_CONCURRENCY):
+        self.mountpoint = mountpoint
+        self.user = user
+        self.cwd = resolve_path("", cwd)
+        self.env_file = env_file
+        self.max_concurrency = max_concurrency
+
+    # --- Caminhos e identidade ---
+
+    def resolve(self, path):
+        """Caminho relativo ao ponto de montagem."""
+        return resolve_path(self.cwd, path)
+
+    def os_path(self, path):
+        """Caminho absoluto no OS."""
+        return os.path.join(self.mountpoint, self.resolve(path))
+
+    def pwd(self):
+        return "/" + self.cwd
+
+    def cd(self, path):
+        relative = self.resolve(path)
+        target = os.path.join(self.mountpoint, relative)
+        with _AsIdentity(self):
+            # FileNotFoundError/PermissionError chegam ao chamador tal como são
+            if not stat.S_ISDIR(os.stat(target).st_mode):
+                raise NotADirectoryError(f"Não é um diretório: {path}")
+        self.cwd = relative
+        return self.pwd()
+
+    def login(self, user):
+        """Muda a identidade da sessão e volta à raiz, como o login() do cliente."""
+        self.user = user
+        self.cwd = ""
+
+    # --- Operações ---
+
+    def stat(self, path):
+        with _AsIdentity(self):
+            return os.stat(self.os_path(path))
+
+    def listdir(self, path=""):
+        with _AsIdentity(self):
+            return sorted(os.listdir(self.os_path(path)), key=lambda s: s.lower())
+
+    def read(self, path):
+        with _AsIdentity(self):
+            with open(self.os_path(path), "rb") as f:
+                return f.read()
+
+    def read_text(self, path, encoding="utf-8"):
+        return self.read(path).decode(encoding)
+
+    def write(self, path, data):
+        """Cria ou sobrescreve um ficheiro. Retorna o número de bytes escritos."""
+        return self._write(path, data, "wb")
+
+    def append(self, path, data):
+        """Anexa a um ficheiro (cria se não existir). Retorna o número de bytes escritos."""
+        return self._write(path, data, "ab")
+
+    def _write(self, path, data, mode):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        target = self.os_path(path)
+        with _AsIdentity(self):
+            if os.path.isdir(target):
+                raise IsADirectoryError(f"O caminho especificado é um diretório: {path}")
+            with open(target, mode) as f:
+                return f.write(data)
+
+    def delete(self, path):
+        target = self.os_path(path)
+        with _AsIdentity(self):
+            if os.path.isdir(target):
+                raise IsADirectoryError(f"O caminho especificado é um diretório: {path}")
+            os.remove(target)
+
+    # --- Operações bulk ---
+
+    def _call(self, fn, path, *args):
+        # Qualquer erro fica no resultado do item, sem interromper o resto do bulk
+        try:
+            return BulkResult(path, True, fn(path, *args))
+        except Exception as e:
+            return BulkResult(path, False, error=e)
+
+    def _bulk(self, fn, items, max_concurrency):
+        workers = max_concurrency or self.max_concurrency
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+            return list(pool.map(lambda item: self._call(fn, *item), items))
+
+    def bulk_stat(self, paths, max_concurrency=None):
+        return self._bulk(self.stat, ((p,) for p in paths), max_concurrency)
+
+    def bulk_listdir(self, paths, max_concurrency=None):
+        return self._bulk(self.listdir, ((p,) for p in paths), max_concurrency)
+
+    def bulk_read(self, paths, max_concurrency=None):
+        return self._bulk(self.read, ((p,) for p in paths), max_concurrency)
+
+    def bulk_write(self, items, max_concurrency=None):
+        """'items' é um dicionário ou iterável de pares (caminho, dados)."""
+        return self._bulk(self.write, _pairs(items), max_concurrency)
+
+    def bulk_append(self, items, max_concurrency=None):
+        return self._bulk(self.append, _pairs(items), max_concurrency)
+
+    def bulk_delete(self, paths, max_concurrency=None):
+        return self._bulk(self.delete, ((p,) for p in paths), max_concurrency)
+
+
+def _pairs(items):
+    return items.items() if isinstance(items, dict) else items
+
+
+class AsyncSession:
+    """
+    Interface asyncio sobre uma Session. As chamadas bloqueantes correm num
+    executor; as operações bulk limitam a concorrência com um semáforo.
+    """
+    def __init__(self, mountpoint=MOUNTPOINT, user=None, cwd="", env_file=ENV_FILE,
+                 max_concurrency=DEFAULT_CONCURRENCY, executor=None):
+        self.session = Session(mountpoint, user, cwd, env_file, max_concurrency)
+        self.max_concurrency = max_concurrency
+        self._executor = executor
+        self._owns_executor = executor is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        return self._executor
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    @property
+    def cwd(self):
+        return self.session.cwd
+
+    def pwd(self):
+        return self.session.pwd()
+
+    def login(self, user):
+        self.session.login(user)
+
+    async def cd(self, path):
+        return await self._run(self.session.cd, path)
+
+    async def stat(self, path):
+        return await self._run(self.session.stat, path)
+
+    async def listdir(self, path=""):
+        return await self._run(self.session.listdir, path)
+
+    async def read(self, path):
+        return await self._run(self.session.read, path)
+
+    async def read_text(self, path, encoding="utf-8"):
+        return await self._run(self.session.read_text, path, encoding)
+
+    async def write(self, path, data):
+        return await self._run(self.session.write, path, data)
+
+    async def append(self, path, data):
+        return await self._run(self.session.append, path, data)
+
+    async def delete(self, path):
+        return await self._run(self.session.delete, path)
+
+    async def _bulk(self, fn, items, max_concurrency):
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def one(path, *args):
+            async with semaphore:
+                return await self._run(self.session._call, fn, path, *args)
+
+        return await asyncio.gather(*(one(*item) for item in items))
+
+    async def bulk_stat(self, paths, max_concurrency=None):
+        return await self._bulk(self.session.stat, ((p,) for p in paths), max_concurrency)
+
+    async def bulk_listdir(self, paths, max_concurrency=None):
+        return await self._bulk(self.session.listdir, ((p,) for p in paths), max_concurrency)
+
+    async def bulk_read(self, paths, max_concurrency=None):
+        return await self._bulk(self.session.read, ((p,) for p in paths), max_concurrency)
+
+    async def bulk_write(self, items, max_concurrency=None):
+        return await self._bulk(self.session.write, _pairs(items), max_concurrency)
+
+    async def bulk_append(self, items, max_concurrency=None):
+        return await self._bulk(self.session.append, _pairs(items), max_concurrency)
+
+    async def bulk_delete(self, paths, max_concurrency=None):
+        return await self._bulk(self.session.delete, ((p,) for p in paths), max_concurrency)
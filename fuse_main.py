@@ -1,26 +1,41 @@
 import os
 import sys
 import errno
+import signal
+import threading
 
 from fuse import FUSE, FuseOSError, Operations
 from auth import get_user_credentials
 from logger import log_action
+from roots import RootRouter
 
 SECURITY_LEVELS = ["UNCLASSIFIED", "CONFIDENTIAL", "SECRET", "TOP_SECRET"]
 
 class SecurePassthrough(Operations):
-    def __init__(self, root):
+    def __init__(self, root, routes=None):
+        # 'routes' é uma lista de (prefixo, diretório real) para o modo multi-root,
+        # ex: [("/top_secret", "/mnt/nvme")]. Sem rotas, tudo é servido por 'root'.
         self.root = root
-        
+        self.router = RootRouter(root, routes or [])
+
+        # O nível é inferido do caminho real: uma raiz cujo caminho já contenha um
+        # nível classificaria todos os ficheiros que serve com esse nível.
+        for backing in self.router.roots:
+            root_level = self.get_file_level(os.path.abspath(backing.path))
+            if root_level != "UNCLASSIFIED":
+                raise ValueError(f"O caminho da raiz '{backing.path}' contém o nível {root_level}")
+
 
     def _get_current_user_credentials(self):
         user_level, is_trusted = get_user_credentials()
         return user_level, is_trusted
 
     def _full_path(self, partial):
+        # Cada pedido é encaminhado para a raiz que serve o seu prefixo
+        backing = self.router.route(partial)
         if partial.startswith("/"):
             partial = partial[1:]
-        path = os.path.join(self.root, partial)
+        path = os.path.join(backing.path, partial)
         return path
 
     def get_file_level(self, path):
@@ -69,11 +84,17 @@ class SecurePassthrough(Operations):
 
         # Política: Usuário pode obter atributos de ficheiros/diretórios de qualquer nivel, mas nao consegue aceder o conteudo
 
+        backing = self.router.route(path)
         try:
             st = os.lstat(full_path)
         except FileNotFoundError:
-            # log_action("getattr", f"{user_level} (user)", full_path, "DENIED (File Not Found)")
-            raise FuseOSError(errno.ENOENT)
+            if not self.router.is_ancestor(path):
+                # log_action("getattr", f"{user_level} (user)", full_path, "DENIED (File Not Found)")
+                backing.record(error=errno.ENOENT)
+                raise FuseOSError(errno.ENOENT)
+            # Diretório intermédio de um prefixo servido por outra raiz (ex: '/projetos' em '/projetos/x')
+            st = os.lstat(backing.path)
+        backing.record()
             
         # log_action("getattr", f"{user_level} (user)", full_path, "GRANTED")
         
@@ -90,11 +111,14 @@ class SecurePassthrough(Operations):
         # Usuário pode listar diretórios diretorios com qualquer nivel, para caso queira escrever para cima
 
         dirents = ['.', '..']
-        if os.path.isdir(full_path):
+        # Entradas servidas por outras raízes (ex: '/top_secret' noutro disco)
+        routed_entries = self.router.children(path)
+        if os.path.isdir(full_path) or routed_entries:
             try:
-                entries = os.listdir(full_path)
+                entries = os.listdir(full_path) if os.path.isdir(full_path) else []
+                entries += sorted(routed_entries - set(entries))
                 for name in entries:
-                    entry_full_path = os.path.join(full_path, name)
+                    entry_full_path = self._full_path(os.path.join(path, name))
                     entry_level = self.get_file_level(entry_full_path)
                     # Adiciona à listagem sempre, mas se o nível do usuário for inferior ao nível do diretório, adiciona um log
                     if SECURITY_LEVELS.index(user_level) >= SECURITY_LEVELS.index(entry_level):
@@ -103,8 +127,10 @@ class SecurePassthrough(Operations):
                         log_action("readdir_entry_filter", f"{user_level} (user)", entry_full_path, f"GRANTED (Entry Level: {entry_level} - Higher)")
                         dirents.append(f"{name}")
                 log_action("readdir", f"{user_level} (user)", full_path, "GRANTED")
+                self.router.route(path).record()
             except OSError as e:
                 log_action("readdir", f"{user_level} (user)", full_path, f"ERROR_OS (Listing failed: {e.strerror})")
+                self.router.route(path).record(error=e.errno)
                 raise FuseOSError(e.errno)
         else:
             log_action("readdir", f"{user_level} (user)", full_path, "FAILED (Not a directory)")
@@ -150,14 +176,17 @@ class SecurePassthrough(Operations):
         # Agora, tenta abrir o ficheiro no sistema de ficheiros subjacente.
         try:
             fd = os.open(full_path, flags)
+            self.router.route(path).record()
             return fd # Retorna o file descriptor
         except FileNotFoundError:
             # Se O_CREAT não estiver nas flags e o ficheiro não existir.
             # Se O_CREAT estiver, este erro não deve acontecer aqui, mas sim em create().
             log_action("open", f"{user_level} (user)", full_path, "DENIED (OS Open Failed - File Not Found)")
+            self.router.route(path).record(error=errno.ENOENT)
             raise FuseOSError(errno.ENOENT)
         except OSError as e:
             log_action("open", f"{user_level} (user)", full_path, f"DENIED (OS Open Failed - {e.strerror})")
+            self.router.route(path).record(error=e.errno)
             raise FuseOSError(e.errno)
 
 
@@ -167,8 +196,10 @@ class SecurePassthrough(Operations):
         user_level, _ = self._get_current_user_credentials() # Para logging
         
         try:
-            os.lseek(fh, offset, os.SEEK_SET)
-            data = os.read(fh, length)
+            # pread não partilha o offset do fd, o que é seguro no modo multi-thread
+            with self.router.route(path).timer("read") as io:
+                data = os.pread(fh, length, offset)
+                io.bytes_read = len(data)
             log_action("read", f"{user_level} (user) fh:{fh}", f"path hint:{path}", f"GRANTED (Read {len(data)} bytes)")
             return data
         except OSError as e:
@@ -181,8 +212,10 @@ class SecurePassthrough(Operations):
         user_level, _ = self._get_current_user_credentials() # Para logging
 
         try:
-            os.lseek(fh, offset, os.SEEK_SET) # O kernel lida com O_APPEND aqui.
-            bytes_written = os.write(fh, buf)
+            # Com O_APPEND o kernel ignora o offset e escreve no fim do ficheiro.
+            with self.router.route(path).timer("write") as io:
+                bytes_written = os.pwrite(fh, buf, offset)
+                io.bytes_written = bytes_written
             log_action("write", f"{user_level} (user) fh:{fh}", f"path hint:{path}", f"GRANTED (Wrote {bytes_written} bytes)")
             return bytes_written
         except OSError as e:
@@ -214,11 +247,22 @@ class SecurePassthrough(Operations):
         try:
             # O_TRUNC é importante para que 'create' se comporte como esperado (ficheiro novo/vazio)
             fd = os.open(full_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+            self.router.route(path).record()
             return fd # Retorna o file descriptor
         except OSError as e:
             log_action("create", f"{user_level} (user)", full_path, f"ERROR_OS ({e.strerror})")
+            self.router.route(path).record(error=e.errno)
             raise FuseOSError(e.errno)
 
+    def release(self, path, fh):
+        # Fecha o file descriptor retornado por open()/create().
+        os.close(fh)
+        return 0
+
+    def destroy(self, path):
+        # Chamado ao desmontar: mostra a distribuição da carga pelas raízes.
+        print(f"[INFO] Métricas por raiz:\n{self.router.format_metrics()}")
+
     def unlink(self, path):
         # Exclui um ficheiro.
         user_level, _ = self._get_current_user_credentials() # is_trusted não é diretamente relevante para a política de unlink aqui
@@ -233,32 +277,85 @@ class SecurePassthrough(Operations):
         
         try:
             result = os.unlink(full_path)
+            self.router.route(path).record()
             log_action("unlink", f"{user_level} (user)", full_path, "SUCCESS (OS Unlink Succeeded)")
             return result
         except FileNotFoundError:
             log_action("unlink", f"{user_level} (user)", full_path, "ERROR_OS (File Not Found)")
+            self.router.route(path).record(error=errno.ENOENT)
             raise FuseOSError(errno.ENOENT)
         except OSError as e:
             log_action("unlink", f"{user_level} (user)", full_path, f"ERROR_OS ({e.strerror})")
+            self.router.route(path).record(error=e.errno)
             raise FuseOSError(e.errno)
 
 
-def main(mountpoint, root):
+def parse_route(spec):
+    """
+    Converte 'NIVEL=diretório' ou '/prefixo=diretório' em (prefixo, diretório).
+    Um nível é servido pelo diretório com o seu nome na raiz (ex: TOP_SECRET -> '/top_secret'),
+    e o diretório real deve conter esse subdiretório (ex: /mnt/nvme/top_secret).
+    """
+    prefix, _, route_root = spec.partition("=")
+    if not prefix or not route_root:
+        raise ValueError(f"Rota inválida: '{spec}'. Use NIVEL=diretório ou /prefixo=diretório")
+    if prefix.upper() in SECURITY_LEVELS:
+        prefix = "/" + prefix.lower()
+    elif not prefix.startswith("/"):
+        raise ValueError(f"Rota inválida: '{prefix}' não é um nível nem um prefixo começado por '/'")
+    return prefix, route_root
+
+
+def _metrics_on_signal(fs):
+    while True:
+        signal.sigwait({signal.SIGUSR1})
+        print(f"[INFO] Métricas por raiz:\n{fs.router.format_metrics()}", flush=True)
+
+
+def main(mountpoint, root, threads=False, routes=None):
     print(f"[INFO] A montar o diretório '{root}' em '{mountpoint}'")
+    for prefix, route_root in routes or []:
+        print(f"[INFO] Prefixo '{prefix}' servido por '{route_root}'")
     print(f"[INFO] Níveis de Segurança Definidos no FUSE: {SECURITY_LEVELS}")
     print("[INFO] Variável de ambiente USER não definida no arranque do FUSE. O login via cliente definirá o usuário para as operações.")
 
-    FUSE(SecurePassthrough(root), mountpoint, nothreads=True, foreground=True)
+    if threads:
+        print("[INFO] Modo multi-thread ativo: o FUSE atende pedidos em várias threads (o código Python continua limitado pelo GIL).")
+    fs = SecurePassthrough(root, routes)
+    # kill -USR1 <pid> mostra as métricas por raiz sem desmontar. A thread principal
+    # fica bloqueada dentro do libfuse, onde o Python não corre handlers de sinais,
+    # por isso o sinal é bloqueado (e herdado bloqueado pelas threads do FUSE) e
+    # recebido por uma thread dedicada.
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})
+    threading.Thread(target=_metrics_on_signal, args=(fs,), daemon=True).start()
+    FUSE(fs, mountpoint, nothreads=not threads, foreground=True)
     print("[INFO] Sistema de ficheiros FUSE desmontado.")
 
 if __name__ == '__main__':
-    if len(sys.argv) != 3:
-        print("Uso: python fuse_main.py <diretório_de_origem_real> <ponto_de_montagem_fuse>")
+    threads = False
+    routes = []
+    args = []
+    argv = iter(sys.argv[1:])
+    try:
+        for arg in argv:
+            if arg == "--threads":
+                threads = True
+            elif arg == "--route":
+                routes.append(parse_route(next(argv, "")))
+            else:
+                args.append(arg)
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        exit(1)
+
+    if len(args) != 2:
+        print("Uso: python fuse_main.py <diretório_de_origem_real> <ponto_de_montagem_fuse> [--threads] [--route NIVEL|/prefixo=diretório ...]")
         print("Exemplo: python fuse_main.py ./data/secure_files /tmp/montagem")
+        print("Exemplo: python fuse_main.py ./data/secure_files /tmp/montagem --threads --route TOP_SECRET=/mnt/nvme")
         exit(1)
     
-    real_root_dir = sys.argv[1]
-    mount_point_dir = sys.argv[2]
+    real_root_dir = args[0]
+    mount_point_dir = args[1]
 
     if not os.path.exists(real_root_dir) or not os.path.isdir(real_root_dir):
         print(f"[ERRO] O diretório de origem '{real_root_dir}' não existe ou não é um diretório.")
@@ -268,4 +365,13 @@ if __name__ == '__main__':
         print(f"[AVISO] O ponto de montagem '{mount_point_dir}' não existe ou não é um diretório.")
         print(f"Por favor, crie o diretório: mkdir -p {mount_point_dir}")
 
-    main(mount_point_dir, real_root_dir)
+    for prefix, route_root in routes:
+        if not os.path.isdir(os.path.join(route_root, prefix.lstrip("/"))):
+            print(f"[ERRO] A raiz '{route_root}' não contém o diretório '{prefix.lstrip('/')}' para o prefixo '{prefix}'.")
+            exit(1)
+
+    try:
+        main(mount_point_dir, real_root_dir, threads, routes)
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        exit(1)
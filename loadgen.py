@@ -0,0 +1,747 @@
+"""
+Gerador de carga concorrente para o sistema de ficheiros seguro.
+
+Simula N utilizadores em simultâneo (threads ou processos), cada um com o seu
+nível de clearance, estado "trusted" e mistura de operações
+(stat/list/read/append/create/delete), sobre uma árvore de ficheiros gerada
+para o efeito. Pode correr diretamente contra o SecurePassthrough (sem FUSE)
+ou contra um ponto de montagem real.
+
+Cada resultado é comparado com um oráculo independente que calcula o
+veredicto BLP esperado, pelo que qualquer operação indevidamente permitida ou
+indevidamente negada é assinalada.
+
+Exemplos:
+    python3 loadgen.py --duration 10
+    python3 loadgen.py --users SECRET:4,TOP_SECRET+trusted:2 --processes 2
+    python3 loadgen.py --change joao@3=SECRET --duration 6
+    python3 loadgen.py --mount /tmp/montagem --modify-users-file --users-file data/users.json --duration 5
+    python3 loadgen.py --route TOP_SECRET=/mnt/nvme --route UNCLASSIFIED=/mnt/hdd
+"""
+import argparse
+import errno
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import secrets
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import logger
+from auth import USERS_FILE
+from fsclient import write_env
+from fuse_main import SECURITY_LEVELS, SecurePassthrough, parse_route
+from roots import METRIC_KEYS, format_metrics
+
+OPERATIONS = ["stat", "list", "read", "append", "create", "delete"]
+DEFAULT_MIX = "stat=20,list=10,read=40,append=15,create=10,delete=5"
+
+GRANTED = "GRANTED"
+DENIED = "DENIED"
+ERROR = "ERROR"
+
+PAYLOAD = b"linha gerada pelo loadgen\n"
+FILE_PREFIX = "loadgen_"
+OWN_FILES = 5 # Ficheiros próprios por utilizador simulado e por nível
+SETUP_USER = "loadgen_setup" # Prefixo do principal TOP_SECRET de confiança que prepara a árvore no modo montagem
+
+
+# --- Oráculo BLP ---
+
+def expected_verdict(op, user_level, is_trusted, file_level):
+    """
+    Calcula o veredicto esperado para uma operação segundo a política adaptada:
+    stat/list são sempre permitidos, read/delete seguem "No Read Up" e
+    append/create seguem "No Write Down" com exceção para utilizadores de confiança.
+    """
+    user_rank = SECURITY_LEVELS.index(user_level)
+    file_rank = SECURITY_LEVELS.index(file_level)
+
+    if op in ("stat", "list"):
+        return GRANTED
+    if op in ("read", "delete"):
+        return GRANTED if user_rank >= file_rank else DENIED
+    # append/create: write-down só é permitido a utilizadores de confiança
+    if user_rank > file_rank and not is_trusted:
+        return DENIED
+    return GRANTED
+
+
+def user_class(level, is_trusted):
+    """Etiqueta usada para agrupar métricas por classe de utilizador."""
+    return f"{level}+trusted" if is_trusted else level
+
+
+# --- Identidades ---
+
+class IdentityTable:
+    """
+    Tabela de credenciais partilhada pelos utilizadores simulados.
+    Cada alteração incrementa a versão, o que permite ao oráculo detetar
+    operações que decorreram durante uma mudança de clearance.
+    """
+    def __init__(self, users):
+        self._lock = threading.Lock()
+        self._users = dict(users) # nome -> (nível, trusted)
+        self._version = 0
+
+    def get(self, name):
+        with self._lock:
+            level, trusted = self._users[name]
+            return level, trusted, self._version
+
+    def set(self, name, level, trusted):
+        with self._lock:
+            self._users[name] = (level, trusted)
+            self._version += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._users)
+
+
+class LoadPassthrough(SecurePassthrough):
+    """SecurePassthrough cujas credenciais vêm da IdentityTable, por thread."""
+    def __init__(self, root, table, routes=None):
+        super().__init__(root, routes)
+        self.table = table
+        self._local = threading.local()
+
+    def act_as(self, name):
+        self._local.user = name
+        logger.set_audit_user(name)
+
+    def _get_current_user_credentials(self):
+        level, trusted, _ = self.table.get(self._local.user)
+        return level, trusted
+
+
+# --- Alvos ---
+
+def _verdict_from_error(e, policy_gated):
+    """
+    EACCES/EPERM é uma recusa da política. Outros erros (ex: ENOENT de um ficheiro
+    apagado por outro utilizador) só contam como permitidos se a política é
+    verificada antes da chamada ao OS; caso contrário o resultado é inconclusivo.
+    """
+    if e.errno in (errno.EACCES, errno.EPERM):
+        return DENIED
+    return GRANTED if policy_gated else ERROR
+
+
+class DirectTarget:
+    """Executa as operações diretamente nos métodos do SecurePassthrough."""
+    def __init__(self, root, table, routes=None):
+        self.fs = LoadPassthrough(root, table, routes)
+
+    def run(self, op, path, user):
+        fs = self.fs
+        fs.act_as(user)
+        try:
+            if op == "stat":
+                fs.getattr(path)
+            elif op == "list":
+                list(fs.readdir(os.path.dirname(path), None))
+            elif op == "read":
+                fh = fs.open(path, os.O_RDONLY)
+                try:
+                    fs.read(path, 4096, 0, fh)
+                finally:
+                    fs.release(path, fh)
+            elif op == "append":
+                fh = fs.open(path, os.O_WRONLY | os.O_APPEND)
+                try:
+                    fs.write(path, PAYLOAD, 0, fh)
+                finally:
+                    fs.release(path, fh)
+            elif op == "create":
+                fh = fs.create(path, 0o644)
+                try:
+                    fs.write(path, PAYLOAD, 0, fh)
+                finally:
+                    fs.release(path, fh)
+            elif op == "delete":
+                fs.unlink(path)
+        except OSError as e: # FuseOSError é uma subclasse de OSError
+            # O SecurePassthrough verifica a política antes de qualquer chamada ao OS
+            return _verdict_from_error(e, policy_gated=True), e.errno
+        return GRANTED, None
+
+    def on_change(self, table):
+        pass # O LoadPassthrough lê a tabela a cada operação
+
+    def root_metrics(self):
+        return self.fs.router.metrics()
+
+
+class MountTarget:
+    """
+    Executa as operações sobre um ponto de montagem FUSE real.
+    A identidade do servidor FUSE é global (ficheiro .env + users.json), por isso
+    cada operação troca a identidade e executa sob um lock: as operações ficam
+    serializadas, mas continuam a ser intercaladas entre utilizadores.
+
+    Os utilizadores simulados são escritos no users.json que o servidor lê.
+    No fim, restore() remove apenas as entradas que o gerador acrescentou e repõe
+    as que alterou, desde que nenhum cliente real as tenha mudado entretanto.
+    """
+    def __init__(self, mountpoint, table, users_file=USERS_FILE):
+        self.mountpoint = mountpoint
+        self.table = table
+        self.users_file = users_file
+        self._lock = threading.Lock()
+        self._active_user = None
+        self._original = {} # nome -> entrada original (None se acrescentada pelo gerador)
+        self._written = {}  # nome -> última entrada escrita pelo gerador
+        # Conta TOP_SECRET de confiança para preparar/limpar a árvore, com nome
+        # imprevisível e presente em users.json apenas durante essas fases
+        self.setup_user = f"{SETUP_USER}_{secrets.token_hex(8)}"
+
+        self._original_env = None
+        if os.path.exists(".env"):
+            with open(".env", "r") as f:
+                self._original_env = f.read()
+        with self._lock:
+            self._update_users(table.snapshot())
+
+    def added_users(self):
+        return sorted(name for name, entry in self._original.items() if entry is None)
+
+    def _update_users(self, users, remove=()):
+        with open(self.users_file, "r") as f:
+            data = json.load(f)
+        for name, (level, trusted) in users.items():
+            self._original.setdefault(name, data.get(name))
+            entry = {"level": level, "trusted": trusted}
+            data[name] = entry
+            self._written[name] = entry
+        for name in remove:
+            data.pop(name, None)
+            self._original.pop(name, None)
+            self._written.pop(name, None)
+        with open(self.users_file, "w") as f:
+            json.dump(data, f, indent=4)
+
+    @contextmanager
+    def as_setup_user(self):
+        with self._lock:
+            self._update_users({self.setup_user: ("TOP_SECRET", True)})
+        try:
+            yield self.setup_user
+        finally:
+            with self._lock:
+                self._update_users({}, remove=[self.setup_user])
+
+    def _switch(self, user):
+        # Mesmo mecanismo que o login() do cliente
+        if user != self._active_user:
+            write_env(".env", user) # Substituição atómica: o servidor nunca lê um .env incompleto
+            self._active_user = user
+
+    def _os_path(self, path):
+        return os.path.join(self.mountpoint, path.lstrip("/"))
+
+    def run(self, op, path, user):
+        os_path = self._os_path(path)
+        with self._lock:
+            self._switch(user)
+            try:
+                if op == "stat":
+                    os.stat(os_path)
+                elif op == "list":
+                    os.listdir(os.path.dirname(os_path))
+                elif op == "read":
+                    with open(os_path, "rb") as f:
+                        f.read(4096)
+                elif op == "append":
+                    fd = os.open(os_path, os.O_WRONLY | os.O_APPEND)
+                    try:
+                        os.write(fd, PAYLOAD)
+                    finally:
+                        os.close(fd)
+                elif op == "create":
+                    with open(os_path, "wb") as f:
+                        f.write(PAYLOAD)
+                elif op == "delete":
+                    os.unlink(os_path)
+            except OSError as e:
+                # O kernel pode falhar o lookup (ENOENT) sem chegar a chamar o open() do FUSE
+                return _verdict_from_error(e, policy_gated=False), e.errno
+            return GRANTED, None
+
+    def root_metrics(self):
+        return {} # As métricas por raiz ficam no processo FUSE (kill -USR1)
+
+    def on_change(self, table):
+        with self._lock:
+            self._update_users(table.snapshot())
+
+    def restore(self):
+        with self._lock:
+            with open(self.users_file, "r") as f:
+                data = json.load(f)
+            for name, original in self._original.items():
+                if data.get(name) != self._written.get(name):
+                    print(f"[AVISO] '{name}' foi alterado durante a execução; entrada mantida em {self.users_file}.")
+                elif original is None:
+                    data.pop(name, None)
+                else:
+                    data[name] = original
+            with open(self.users_file, "w") as f:
+                json.dump(data, f, indent=4)
+            self._original.clear()
+            self._written.clear()
+
+            if self._original_env is not None:
+                with open(".env", "w") as f:
+                    f.write(self._original_env)
+            elif os.path.exists(".env"):
+                os.remove(".env")
+
+
+# --- Árvore de teste ---
+
+def file_names(files_per_level):
+    return [f"{FILE_PREFIX}{i}.txt" for i in range(files_per_level)]
+
+
+def _check_absent(paths):
+    for path in paths:
+        if os.path.lexists(path):
+            raise FileExistsError(f"'{path}' já existe: o gerador não sobrescreve nem apaga ficheiros que não criou")
+
+
+def generate_tree(fs, files, own_files, created_dirs, tree_files):
+    """
+    Cria um diretório por nível de segurança com ficheiros pequenos, na raiz que serve cada nível.
+    Recusa correr (FileExistsError) se algum ficheiro partilhado ou próprio dos utilizadores
+    simulados já existir. 'created_dirs' e 'tree_files' recebem os diretórios criados e os
+    caminhos reservados pelo gerador, que são os únicos que cleanup_tree() remove.
+    """
+    level_dirs = [fs._full_path(f"/{level.lower()}") for level in SECURITY_LEVELS]
+    paths = [os.path.join(level_dir, name) for level_dir in level_dirs for name in files + own_files]
+    _check_absent(paths)
+    tree_files.extend(paths)
+    for level_dir in level_dirs:
+        if not os.path.isdir(level_dir):
+            os.makedirs(level_dir)
+            created_dirs.append(level_dir)
+        for name in files:
+            with open(os.path.join(level_dir, name), "xb") as f:
+                f.write(PAYLOAD)
+
+
+def cleanup_tree(created_dirs, tree_files):
+    """Apaga apenas os ficheiros reservados pelo gerador e os diretórios que criou, se ficarem vazios."""
+    for path in tree_files:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass # Ficheiro próprio que não chegou a ser criado (ou já foi apagado)
+    for level_dir in created_dirs:
+        try:
+            os.rmdir(level_dir)
+        except OSError:
+            pass # Não está vazio: contém ficheiros que não são do gerador
+
+
+def populate_mount(target, files, own_files, tree_files):
+    """
+    Cria os ficheiros de teste através da montagem, como utilizador de confiança TOP_SECRET.
+    Tal como generate_tree(), recusa sobrescrever ficheiros existentes e guarda em
+    'tree_files' os caminhos (relativos à montagem) que cleanup_mount() pode apagar.
+    """
+    for level in SECURITY_LEVELS:
+        if not os.path.isdir(os.path.join(target.mountpoint, level.lower())):
+            raise FileNotFoundError(f"Diretório '{level.lower()}' não existe no ponto de montagem '{target.mountpoint}'")
+    paths = [f"/{level.lower()}/{name}" for level in SECURITY_LEVELS for name in files + own_files]
+    _check_absent(target._os_path(path) for path in paths)
+    tree_files.extend(paths)
+    with target.as_setup_user() as setup_user:
+        for level in SECURITY_LEVELS:
+            for name in files:
+                verdict, err = target.run("create", f"/{level.lower()}/{name}", setup_user)
+                if verdict != GRANTED or err is not None:
+                    raise OSError(err, f"Não foi possível criar '{level.lower()}/{name}' na montagem")
+
+
+def cleanup_mount(target, tree_files):
+    """Apaga da montagem apenas os ficheiros reservados pelo gerador (partilhados e próprios de cada utilizador)."""
+    with target.as_setup_user() as setup_user:
+        for path in tree_files:
+            target.run("delete", path, setup_user) # ENOENT: ficheiro próprio que não chegou a existir
+
+
+# --- Métricas ---
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Stats:
+    """Latências e contadores por operação e por classe de utilizador."""
+    def __init__(self):
+        self.by_op = {}
+        self.by_class = {}
+        self.mismatches = []
+        self.racy = 0
+        self.root_metrics = {}
+
+    @staticmethod
+    def _bucket(table, key):
+        return table.setdefault(key, {"latencies": [], GRANTED: 0, DENIED: 0, ERROR: 0, "os_errors": 0})
+
+    def add(self, op, klass, verdict, latency, os_error=False):
+        for table, key in ((self.by_op, op), (self.by_class, klass)):
+            bucket = self._bucket(table, key)
+            bucket["latencies"].append(latency)
+            bucket[verdict] += 1
+            bucket["os_errors"] += 1 if os_error else 0
+
+    def merge(self, other):
+        for name in ("by_op", "by_class"):
+            mine = getattr(self, name)
+            for key, bucket in getattr(other, name).items():
+                target = self._bucket(mine, key)
+                target["latencies"].extend(bucket["latencies"])
+                for counter in (GRANTED, DENIED, ERROR, "os_errors"):
+                    target[counter] += bucket[counter]
+        self.mismatches.extend(other.mismatches)
+        self.racy += other.racy
+        for label, metrics in other.root_metrics.items():
+            target = self.root_metrics.setdefault(label, dict.fromkeys(METRIC_KEYS, 0))
+            for key in METRIC_KEYS:
+                target[key] += metrics[key]
+
+    def summary(self, elapsed):
+        def rows(table):
+            result = {}
+            for key, bucket in sorted(table.items()):
+                latencies = sorted(bucket["latencies"])
+                result[key] = {
+                    "ops": len(latencies),
+                    "ops_per_s": len(latencies) / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(latencies, 50) * 1000,
+                    "p95_ms": percentile(latencies, 95) * 1000,
+                    "p99_ms": percentile(latencies, 99) * 1000,
+                    "granted": bucket[GRANTED],
+                    "denied": bucket[DENIED],
+                    "os_errors": bucket["os_errors"],
+                    "inconclusive": bucket[ERROR],
+                }
+            return result
+
+        return {
+            "elapsed_s": elapsed,
+            "by_op": rows(self.by_op),
+            "by_class": rows(self.by_class),
+            "wrongly_granted": sum(1 for m in self.mismatches if m["got"] == GRANTED),
+            "wrongly_denied": sum(1 for m in self.mismatches if m["got"] == DENIED),
+            "racy_ops": self.racy,
+            "by_root": self.root_metrics,
+            "mismatches": self.mismatches,
+        }
+
+
+# --- Execução ---
+
+def own_file_names(seed):
+    """Ficheiros que um utilizador simulado cria e apaga (os ficheiros partilhados nunca são apagados)."""
+    return [f"{FILE_PREFIX}w{seed}_{i}.txt" for i in range(OWN_FILES)]
+
+
+def worker_seeds(n_users, seed):
+    """Sementes dos utilizadores simulados de um shard (uma por utilizador, como em run_shard())."""
+    return [seed + i for i in range(n_users)]
+
+
+def _user_worker(name, target, table, weights, files, deadline, max_ops, seed, stats):
+    rng = random.Random(seed)
+    own_names = own_file_names(seed)
+    created = {level: set() for level in SECURITY_LEVELS} # ficheiros próprios que existem
+    done = 0
+    while time.time() < deadline and (max_ops is None or done < max_ops):
+        op = rng.choices(OPERATIONS, weights=weights)[0]
+        file_level = rng.choice(SECURITY_LEVELS)
+        if op == "create":
+            file_name = rng.choice(own_names)
+        elif op == "delete":
+            # Apaga preferencialmente um ficheiro próprio que exista, para manter a árvore estável
+            file_name = rng.choice(sorted(created[file_level]) or own_names)
+        else:
+            file_name = rng.choice(files)
+        path = f"/{file_level.lower()}/{file_name}"
+
+        level, trusted, version = table.get(name)
+        start = time.perf_counter()
+        verdict, err = target.run(op, path, name)
+        latency = time.perf_counter() - start
+        after_level, after_trusted, after_version = table.get(name)
+
+        expected = {expected_verdict(op, level, trusted, file_level)}
+        if after_version != version:
+            # A clearance pode ter mudado durante a operação: ambos os veredictos são válidos
+            expected.add(expected_verdict(op, after_level, after_trusted, file_level))
+            stats.racy += 1
+
+        if op == "create" and verdict == GRANTED and err is None:
+            created[file_level].add(file_name)
+        elif op == "delete" and verdict == GRANTED:
+            created[file_level].discard(file_name)
+
+        stats.add(op, user_class(level, trusted), verdict, latency, os_error=err is not None and verdict != DENIED)
+        if verdict != ERROR and verdict not in expected:
+            stats.mismatches.append({
+                "user": name, "class": user_class(level, trusted), "op": op, "path": path,
+                "file_level": file_level, "expected": sorted(expected), "got": verdict,
+            })
+        done += 1
+
+
+def _scheduler(changes, table, target, start, stop_event):
+    for offset, name, level, trusted in sorted(changes):
+        if stop_event.wait(max(0.0, start + offset - time.time())):
+            return
+        table.set(name, level, trusted)
+        target.on_change(table)
+
+
+def run_shard(target, users, table, changes, weights, files, start, duration, max_ops, seed):
+    """Corre um conjunto de utilizadores simulados em threads, no processo atual."""
+    stats_per_user = [Stats() for _ in users]
+    stop_event = threading.Event()
+    scheduler = threading.Thread(target=_scheduler, args=(changes, table, target, start, stop_event), daemon=True)
+    scheduler.start()
+
+    deadline = start + duration
+    threads = [
+        threading.Thread(target=_user_worker, args=(name, target, table, weights, files, deadline, max_ops,
+                                                     user_seed, stats_per_user[i]))
+        for i, (name, user_seed) in enumerate(zip(users, worker_seeds(len(users), seed)))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stop_event.set()
+
+    stats = Stats()
+    for s in stats_per_user:
+        stats.merge(s)
+    stats.root_metrics = target.root_metrics()
+    return stats
+
+
+def _run_process_shard(root, routes, audit_log, identities, users, changes, weights, files, start, duration, max_ops, seed):
+    # Cada processo tem a sua tabela e aplica o mesmo calendário de alterações
+    logger.AUDIT_LOG = audit_log
+    table = IdentityTable(identities)
+    return run_shard(DirectTarget(root, table, routes), users, table, changes, weights, files,
+                     start, duration, max_ops, seed)
+
+
+# --- Linha de comandos ---
+
+def parse_mix(spec):
+    weights = dict.fromkeys(OPERATIONS, 0)
+    for item in spec.split(","):
+        op, _, weight = item.partition("=")
+        if op not in weights:
+            raise ValueError(f"Operação desconhecida: '{op}'. Use uma de: {', '.join(OPERATIONS)}")
+        weights[op] = float(weight)
+    return [weights[op] for op in OPERATIONS]
+
+
+def parse_level(spec):
+    """'SECRET' ou 'SECRET+trusted' -> (nível, trusted)."""
+    level, _, flag = spec.partition("+")
+    level = level.upper()
+    if level not in SECURITY_LEVELS:
+        raise ValueError(f"Nível inválido: '{level}'. Use um de: {', '.join(SECURITY_LEVELS)}")
+    return level, flag.lower() == "trusted"
+
+
+def parse_users(spec, per_user, users_file):
+    """
+    Constrói a lista de utilizadores simulados. Sem especificação, usa os principais
+    de users.json, cada um replicado 'per_user' vezes (as réplicas partilham a identidade).
+    """
+    identities = {}
+    workers = []
+    if spec:
+        for item in spec.split(","):
+            klass, _, count = item.rpartition(":")
+            level, trusted = parse_level(klass)
+            for i in range(int(count)):
+                name = f"{FILE_PREFIX}{user_class(level, trusted).lower().replace('+', '_')}_{i}"
+                identities[name] = (level, trusted)
+                workers.append(name)
+    else:
+        with open(users_file, "r") as f:
+            data = json.load(f)
+        for name, creds in data.items():
+            identities[name] = (creds.get("level", "UNCLASSIFIED"), creds.get("trusted", False))
+            workers.extend([name] * per_user)
+    return identities, workers
+
+
+def parse_change(spec):
+    """'NOME@SEGUNDOS=NIVEL[+trusted]' -> (segundos, nome, nível, trusted)."""
+    target, _, level_spec = spec.partition("=")
+    name, _, offset = target.partition("@")
+    level, trusted = parse_level(level_spec)
+    return float(offset), name, level, trusted
+
+
+def print_report(summary):
+    header = f"  {'':<24}{'ops':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'perm.':>8}{'neg.':>8}{'erros OS':>10}{'inconcl.':>10}"
+    for title, key in (("Por operação", "by_op"), ("Por classe de utilizador", "by_class")):
+        print(f"\n{title}:")
+        print(header)
+        for name, row in summary[key].items():
+            print(f"  {name:<24}{row['ops']:>8}{row['ops_per_s']:>10.1f}{row['p50_ms']:>10.3f}"
+                  f"{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['granted']:>8}{row['denied']:>8}{row['os_errors']:>10}{row['inconclusive']:>10}")
+
+    print(f"\nDuração: {summary['elapsed_s']:.2f}s | Operações durante alterações de clearance: {summary['racy_ops']}")
+    if summary["by_root"]:
+        print(f"\nPor raiz:\n{format_metrics(summary['by_root'])}")
+    print(f"Indevidamente permitidas: {summary['wrongly_granted']} | Indevidamente negadas: {summary['wrongly_denied']}")
+    for m in summary["mismatches"][:20]:
+        print(f"  [VIOLAÇÃO] {m['user']} ({m['class']}) {m['op']} {m['path']}: esperado {'/'.join(m['expected'])}, obtido {m['got']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerador de carga concorrente com verificação da política BLP.")
+    parser.add_argument("--users", help="Classes de utilizadores simulados, ex: 'SECRET:4,TOP_SECRET+trusted:2' (por omissão: users.json)")
+    parser.add_argument("--per-user", type=int, default=2, help="Réplicas por principal de users.json (por omissão: 2)")
+    parser.add_argument("--users-file", default=USERS_FILE, help=f"Ficheiro de utilizadores (por omissão: {USERS_FILE})")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Pesos das operações (por omissão: {DEFAULT_MIX})")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração em segundos (por omissão: 10)")
+    parser.add_argument("--ops", type=int, help="Número máximo de operações por utilizador simulado")
+    parser.add_argument("--files", type=int, default=20, help="Ficheiros por nível na árvore gerada (por omissão: 20)")
+    parser.add_argument("--processes", type=int, default=0, help="Distribui os utilizadores por N processos em vez de threads")
+    parser.add_argument("--change", action="append", default=[], help="Alteração de clearance a meio: 'NOME@SEGUNDOS=NIVEL[+trusted]'")
+    parser.add_argument("--root", help="Diretório onde gerar a árvore (por omissão: diretório temporário)")
+    parser.add_argument("--audit-log", help="Ficheiro de auditoria do modo direto (por omissão: audit.log no diretório temporário da execução)")
+    parser.add_argument("--no-audit", action="store_true", help="Desativa a auditoria no modo direto")
+    parser.add_argument("--mount", help="Ponto de montagem FUSE ativo (em vez de usar o SecurePassthrough diretamente)")
+    parser.add_argument("--modify-users-file", action="store_true",
+                        help="Obrigatório com --mount: autoriza acrescentar os utilizadores simulados ao users.json que o servidor lê")
+    parser.add_argument("--route", action="append", default=[], help="Raiz adicional (multi-root): 'NIVEL=diretório' ou '/prefixo=diretório'")
+    parser.add_argument("--json", help="Guarda o relatório completo neste ficheiro")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        weights = parse_mix(args.mix)
+        identities, workers = parse_users(args.users, args.per_user, args.users_file)
+        changes = [parse_change(c) for c in args.change]
+        routes = [parse_route(r) for r in args.route]
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        return 2
+    for _, name, _, _ in changes:
+        if name not in identities:
+            print(f"[ERRO] Utilizador '{name}' da alteração de clearance não é simulado.")
+            return 2
+    if args.mount and args.processes:
+        print("[ERRO] No modo montagem a identidade é global ao servidor FUSE; use threads.")
+        return 2
+    if args.mount and routes:
+        print("[ERRO] No modo montagem as raízes são configuradas no fuse_main.py (--route).")
+        return 2
+
+    if args.mount and not args.modify_users_file:
+        print(f"[ERRO] O modo montagem acrescenta utilizadores (incluindo uma conta TOP_SECRET de confiança temporária) a '{args.users_file}'.")
+        print("Use um users.json de teste e confirme com --modify-users-file.")
+        return 2
+
+    files = file_names(args.files)
+    if args.processes:
+        shards = [(workers[i::args.processes], args.seed + 1000 * i) for i in range(args.processes)]
+    else:
+        shards = [(workers, args.seed)]
+    own_files = [name for shard, seed in shards for s in worker_seeds(len(shard), seed) for name in own_file_names(s)]
+    run_dir = None
+    root = None
+    tree_fs = None
+    created_dirs = []
+    tree_files = []
+    target = None
+    print(f"[INFO] {len(workers)} utilizadores simulados, {len(identities)} identidades, "
+          f"{'montagem ' + args.mount if args.mount else 'SecurePassthrough direto'}")
+
+    # SIGTERM passa pelos blocos finally (limpeza da árvore e do users.json)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(143))
+
+    try:
+        try:
+            if args.mount:
+                table = IdentityTable(identities)
+                target = MountTarget(args.mount, table, args.users_file)
+                print(f"[AVISO] Contas acrescentadas a '{args.users_file}' durante a execução: {', '.join(target.added_users()) or '(nenhuma)'}")
+                print(f"[AVISO] Conta TOP_SECRET de confiança '{target.setup_user}' presente apenas enquanto a árvore é criada/apagada.")
+                populate_mount(target, files, own_files, tree_files)
+            else:
+                run_dir = tempfile.mkdtemp(prefix="loadgen_")
+                root = args.root or os.path.join(run_dir, "tree")
+                # A auditoria do modo direto não vai para o audit.log do repositório
+                logger.AUDIT_LOG = None if args.no_audit else (args.audit_log or os.path.join(run_dir, "audit.log"))
+                tree_fs = SecurePassthrough(root, routes)
+                generate_tree(tree_fs, files, own_files, created_dirs, tree_files)
+        except (OSError, ValueError) as e:
+            print(f"[ERRO] {e}")
+            return 2
+
+        start = time.time()
+        if args.processes:
+            with ProcessPoolExecutor(max_workers=args.processes) as pool:
+                futures = [pool.submit(_run_process_shard, root, routes, logger.AUDIT_LOG, identities, shard, changes,
+                                       weights, files, start, args.duration, args.ops, seed)
+                           for shard, seed in shards if shard]
+                stats = Stats()
+                for future in futures:
+                    stats.merge(future.result())
+        else:
+            if not args.mount:
+                table = IdentityTable(identities)
+                target = DirectTarget(root, table, routes)
+            stats = run_shard(target, workers, table, changes, weights, files,
+                              start, args.duration, args.ops, args.seed)
+        elapsed = time.time() - start
+    finally:
+        if args.mount and target is not None:
+            try:
+                if tree_files:
+                    cleanup_mount(target, tree_files)
+            finally:
+                target.restore()
+        if tree_fs is not None:
+            cleanup_tree(created_dirs, tree_files)
+        if run_dir:
+            if not args.root:
+                shutil.rmtree(root, ignore_errors=True)
+            if logger.AUDIT_LOG and os.path.exists(logger.AUDIT_LOG):
+                print(f"[INFO] Auditoria da execução em '{logger.AUDIT_LOG}'")
+            if not os.listdir(run_dir):
+                os.rmdir(run_dir)
+
+    summary = stats.summary(elapsed)
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=4)
+    return 1 if summary["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
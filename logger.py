@@ -1,9 +1,20 @@
 from datetime import datetime
-import os
-from dotenv import load_dotenv
+import threading
+from auth import get_current_user
+
+AUDIT_LOG = "audit.log" # None desativa a auditoria (ex: loadgen.py --no-audit)
+
+# Utilizador por thread, para quem simula vários utilizadores no mesmo processo (loadgen.py)
+_context = threading.local()
+
+def set_audit_user(user):
+    _context.user = user
 
 def log_action(action, level,path, status):
-    load_dotenv(override=True)  # Load environment variables
-    user = os.getenv("USER", "default_user")
-    with open("audit.log", "a") as f:
+    if AUDIT_LOG is None:
+        return
+    user = getattr(_context, "user", None)
+    if user is None:
+        user = get_current_user()
+    with open(AUDIT_LOG, "a") as f:
         f.write(f"{datetime.now()} | {user} - {level} | {action} | {path} | {status}\n")
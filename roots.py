@@ -0,0 +1,144 @@
+"""
+Encaminhamento de pedidos para várias raízes de armazenamento (multi-root).
+
+Cada BackingRoot serve um prefixo do ponto de montagem (ex: '/top_secret')
+a partir de um diretório real; a raiz por omissão serve tudo o resto.
+O caminho real mantém o caminho relativo completo
+(ex: '/top_secret/doc.txt' -> '/mnt/nvme/top_secret/doc.txt'), para que o
+nível de segurança continue a ser inferido do caminho como antes.
+"""
+import errno
+import os
+import threading
+import time
+
+METRIC_KEYS = ("ops", "reads", "writes", "bytes_read", "bytes_written", "errors", "not_found", "io_time")
+
+
+def normalize_prefix(prefix):
+    """'top_secret/' -> '/top_secret'; '/' -> ''."""
+    prefix = os.path.normpath("/" + prefix.strip("/"))
+    return "" if prefix == "/" else prefix
+
+
+class BackingRoot:
+    """
+    Diretório real que serve um prefixo do ponto de montagem, com métricas próprias.
+    Cada raiz tem o seu lock de métricas, pelo que o registo numa raiz não bloqueia as outras.
+    """
+    def __init__(self, path, prefix=""):
+        self.path = path
+        self.prefix = normalize_prefix(prefix)
+        self.label = f"{self.prefix or '/'} -> {path}"
+        self._lock = threading.Lock()
+        self._metrics = dict.fromkeys(METRIC_KEYS, 0)
+
+    def owns(self, partial):
+        return not self.prefix or partial == self.prefix or partial.startswith(self.prefix + "/")
+
+    def record(self, op=None, bytes_read=0, bytes_written=0, io_time=0.0, error=None):
+        """
+        Regista uma operação. 'op' ("read"/"write") conta as leituras e escritas mesmo
+        quando não movem bytes (ex: leitura no EOF); 'error' é o errno de uma falha.
+        ENOENT conta à parte (not_found): o kernel faz lookups de nomes inexistentes
+        por rotina, e misturá-los com os erros esconderia os problemas reais do disco.
+        """
+        with self._lock:
+            m = self._metrics
+            m["ops"] += 1
+            m["reads"] += 1 if op == "read" else 0
+            m["writes"] += 1 if op == "write" else 0
+            m["bytes_read"] += bytes_read
+            m["bytes_written"] += bytes_written
+            m["io_time"] += io_time
+            if error == errno.ENOENT:
+                m["not_found"] += 1
+            elif error:
+                m["errors"] += 1
+
+    def timer(self, op):
+        return _IoTimer(self, op)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self._metrics)
+
+
+class _IoTimer:
+    """Mede o tempo de uma operação de I/O e regista-a na raiz."""
+    def __init__(self, root, op):
+        self.root = root
+        self.op = op
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        error = None
+        if exc_type is not None:
+            error = getattr(exc, "errno", None) or errno.EIO
+        self.root.record(self.op, self.bytes_read, self.bytes_written,
+                         time.perf_counter() - self._start, error=error)
+
+
+class RootRouter:
+    """Escolhe a raiz de um caminho pelo prefixo mais longo que lhe corresponde."""
+    def __init__(self, default_root, routes=()):
+        self.default = BackingRoot(default_root)
+        self.routes = []
+        for prefix, path in routes:
+            root = BackingRoot(path, prefix)
+            if not root.prefix:
+                raise ValueError(f"Prefixo inválido para a raiz '{path}': use a raiz principal para '/'")
+            if any(r.prefix == root.prefix for r in self.routes):
+                raise ValueError(f"Prefixo '{root.prefix}' atribuído a mais de uma raiz")
+            self.routes.append(root)
+        self.routes.sort(key=lambda r: len(r.prefix), reverse=True)
+
+    @property
+    def roots(self):
+        return [self.default] + self.routes
+
+    def route(self, partial):
+        partial = normalize_prefix(partial)
+        for root in self.routes:
+            if root.owns(partial):
+                return root
+        return self.default
+
+    def children(self, partial):
+        """Nomes que outras raízes acrescentam à listagem do diretório 'partial'."""
+        partial = normalize_prefix(partial)
+        base = partial + "/"
+        names = set()
+        for root in self.routes:
+            if root.prefix.startswith(base):
+                names.add(root.prefix[len(base):].split("/")[0])
+        return names
+
+    def is_ancestor(self, partial):
+        """True se 'partial' é um diretório intermédio de algum prefixo encaminhado."""
+        return bool(self.children(partial))
+
+    def metrics(self):
+        return {root.label: root.metrics() for root in self.roots}
+
+    def format_metrics(self):
+        return format_metrics(self.metrics())
+
+
+def format_metrics(metrics):
+    """Tabela com as métricas por raiz e a percentagem de operações e bytes de cada uma."""
+    total_ops = sum(m["ops"] for m in metrics.values()) or 1
+    total_bytes = sum(m["bytes_read"] + m["bytes_written"] for m in metrics.values()) or 1
+    lines = [f"  {'raiz':<40}{'ops':>10}{'% ops':>8}{'leituras':>10}{'escritas':>10}{'lidos':>14}{'escritos':>14}{'% bytes':>9}"
+             f"{'erros':>8}{'ENOENT':>8}{'I/O s':>10}"]
+    for label, m in metrics.items():
+        moved = m["bytes_read"] + m["bytes_written"]
+        lines.append(f"  {label:<40}{m['ops']:>10}{100 * m['ops'] / total_ops:>7.1f}%{m['reads']:>10}{m['writes']:>10}"
+                     f"{m['bytes_read']:>14}{m['bytes_written']:>14}{100 * moved / total_bytes:>8.1f}%"
+                     f"{m['errors']:>8}{m['not_found']:>8}{m['io_time']:>10.3f}")
+    return "\n".join(lines)